@@ -1154,6 +1154,10 @@ class ContentEquipmentListExpansionItemInline(ContentTabularInline):
     verbose_name = "Expansion Item"
     verbose_name_plural = "Expansion Items"
 
+    def get_queryset(self, request):
+        # Each row displays the item, which needs its related objects
+        return super().get_queryset(request).with_display()
+
 
 @admin.register(ContentEquipmentListExpansion)
 class ContentEquipmentListExpansionAdmin(ContentAdmin):
@@ -1187,6 +1191,15 @@ class ContentEquipmentListExpansionRuleByAttributeAdmin(
     list_display = ["__str__", "attribute"]
     search_fields = ["attribute__name"]
 
+    def get_queryset(self, request):
+        # __str__ displays the attribute and its values
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("attribute")
+            .prefetch_related("attribute_values")
+        )
+
 
 @admin.register(ContentEquipmentListExpansionRuleByHouse)
 class ContentEquipmentListExpansionRuleByHouseAdmin(
@@ -1194,6 +1207,7 @@ class ContentEquipmentListExpansionRuleByHouseAdmin(
 ):
     autocomplete_fields = ["house"]
     list_display = ["__str__", "house"]
+    list_select_related = ["house"]
     search_fields = ["house__name"]
 
 
@@ -487,13 +487,13 @@ class ContentEquipmentQuerySet(models.QuerySet):
         )
 
         # Filter to only expansions that apply
-        expansion_ids = ContentEquipmentListExpansion.get_applicable_expansions(
+        expansion_ids = ContentEquipmentListExpansion.get_applicable_expansion_ids(
             rule_inputs
-        ).values("id")
+        )
 
         # Get expansion item cost overrides (only for base equipment, not profiles)
         expansion_items = ContentEquipmentListExpansionItem.objects.filter(
-            expansion__in=Subquery(expansion_ids),
+            expansion__in=expansion_ids,
             equipment=OuterRef("pk"),
             weapon_profile__isnull=True,  # Only base equipment costs, not profile-specific
         )
@@ -554,13 +554,13 @@ class ContentEquipmentQuerySet(models.QuerySet):
         )
 
         # Filter to only expansions that apply
-        expansion_ids = ContentEquipmentListExpansion.get_applicable_expansions(
+        expansion_ids = ContentEquipmentListExpansion.get_applicable_expansion_ids(
             rule_inputs
-        ).values("id")
+        )
 
         # Get expansion item profile cost overrides
         expansion_profile_items = ContentEquipmentListExpansionItem.objects.filter(
-            expansion__in=Subquery(expansion_ids),
+            expansion__in=expansion_ids,
             equipment=OuterRef("equipment"),
             weapon_profile=OuterRef("pk"),
         )
@@ -2373,6 +2373,31 @@ class ContentPageRef(Content):
         cache.set(key, refs)
         return refs
 
+    @classmethod
+    def find_similar_bulk(cls, titles, **kwargs):
+        """
+        Finds similar references for several titles with a single query.
+        Returns a dict mapping each title to a list of matching references,
+        in the same order find_similar would return them.
+        """
+        titles = set(titles)
+        if not titles:
+            return {}
+
+        query = Q()
+        for title in titles:
+            query |= Q(title__icontains=title)
+
+        refs = list(
+            ContentPageRef.objects.filter(**kwargs)
+            .filter(query)
+            .select_related("book", "parent")
+        )
+        return {
+            title: [ref for ref in refs if title.lower() in ref.title.lower()]
+            for title in titles
+        }
+
     # TODO: Move this to a custom Manager
     @classmethod
     def all_ordered(cls):
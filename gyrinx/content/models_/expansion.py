@@ -1,10 +1,13 @@
 import logging
+import re
 from dataclasses import dataclass
 from typing import Optional
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Case, Count, F, Q, When
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 from multiselectfield import MultiSelectField
 from polymorphic.models import PolymorphicModel
 from simple_history.models import HistoricalRecords
@@ -61,13 +64,42 @@ class ContentEquipmentListExpansion(Content):
         Check if this expansion applies to the given list and fighter.
         All rules must match (AND logic).
         """
+        # Evaluate the rules in SQL rather than calling match() on each rule
+        return self.pk in type(self).get_applicable_expansion_ids(rule_inputs)
 
-        # All rules must match
-        for rule in self.rules.all():
-            if not rule.match(rule_inputs):
-                return False
+    @classmethod
+    def get_applicable_expansion_ids(cls, rule_inputs: ExpansionRuleInputs) -> tuple:
+        """
+        Get the IDs of all expansions that apply to the given rule inputs.
+
+        The IDs are cached on the list instance, keyed by fighter and the list's
+        active attribute values, so repeated lookups for the same inputs within
+        a request only run the query once.
+        """
+        input_list = rule_inputs.list
+        input_fighter = rule_inputs.fighter
+
+        cache_key = (
+            input_fighter.id if input_fighter else None,
+            input_fighter.get_category() if input_fighter else None,
+            input_list.content_house_id,
+            tuple(sorted(input_list.active_attribute_value_ids)),
+        )
+
+        if not hasattr(input_list, "_applicable_expansion_ids_cache"):
+            input_list._applicable_expansion_ids_cache = {}
 
-        return True
+        try:
+            return input_list._applicable_expansion_ids_cache[cache_key]
+        except KeyError:
+            pass
+
+        # A tuple, so callers can't change the cached IDs
+        expansion_ids = tuple(
+            cls.get_applicable_expansions(rule_inputs).values_list("id", flat=True)
+        )
+        input_list._applicable_expansion_ids_cache[cache_key] = expansion_ids
+        return expansion_ids
 
     @classmethod
     def get_applicable_expansions(cls, rule_inputs: ExpansionRuleInputs):
@@ -78,43 +110,73 @@ class ContentEquipmentListExpansion(Content):
         input_list = rule_inputs.list
         input_fighter = rule_inputs.fighter
 
-        # First we find all the rules that match the list and fighter
-        list_rules = Q(
-            ContentEquipmentListExpansionRuleByAttribute___attribute_values__in=[
-                aa.attribute_value.id for aa in input_list.active_attributes_cached
+        # First we find all the rules that match the list and fighter, leaving
+        # out the kinds of rule that these inputs can't match
+        rule_filters = []
+
+        attribute_value_ids = input_list.active_attribute_value_ids
+        if attribute_value_ids:
+            attribute_ids = ContentAttributeValue.objects.filter(
+                id__in=attribute_value_ids
+            ).values("attribute_id")
+            rule_filters += [
+                Q(
+                    ContentEquipmentListExpansionRuleByAttribute___attribute_values__in=attribute_value_ids
+                ),
+                # Attribute rules with no specific values match any value of the attribute
+                Q(
+                    ContentEquipmentListExpansionRuleByAttribute___attribute_values__isnull=True,
+                    ContentEquipmentListExpansionRuleByAttribute___attribute__in=attribute_ids,
+                ),
             ]
-        ) | Q(ContentEquipmentListExpansionRuleByHouse___house=input_list.content_house)
 
-        fighter_rules = (
-            Q(
-                ContentEquipmentListExpansionRuleByFighterCategory___fighter_categories__contains=input_fighter.get_category()
+        if input_list.content_house_id is not None:
+            rule_filters.append(
+                Q(
+                    ContentEquipmentListExpansionRuleByHouse___house=input_list.content_house_id
+                )
             )
-            if input_fighter
-            else None
-        )
 
-        # This gets us all the rules that match the inputs
-        applicable_rules = ContentEquipmentListExpansionRule.objects.filter(
-            (list_rules | fighter_rules) if fighter_rules else list_rules
-        ).distinct()
+        fighter_category = input_fighter.get_category() if input_fighter else None
+        if fighter_category:
+            rule_filters.append(
+                # The categories are stored comma-separated, so match a whole
+                # entry rather than any substring of the column
+                Q(
+                    ContentEquipmentListExpansionRuleByFighterCategory___fighter_categories__regex=rf"(^|,){re.escape(fighter_category)}(,|$)"
+                )
+            )
+
+        # No rule can match, so no expansion can apply
+        if not rule_filters:
+            return cls.objects.none()
+
+        matching_rules = Q()
+        for rule_filter in rule_filters:
+            matching_rules |= rule_filter
+
+        # This gets us the IDs of all the rules that match the inputs. Only the IDs
+        # are needed, so skip polymorphic downcasting to the rule subclasses.
+        applicable_rule_ids = (
+            ContentEquipmentListExpansionRule.objects.non_polymorphic()
+            .filter(matching_rules)
+            .values_list("id", flat=True)
+            .distinct()
+        )
 
         # Then we need to find expansions that have _all_ these rules matching, and only these
-        applicable_expansions = (
-            cls.objects
-            # Count how many of this expansion's rules are in applicable_rules
-            .annotate(
-                matched=Count(
-                    "rules", filter=Q(rules__in=applicable_rules), distinct=True
-                ),
-                total=Count("rules", distinct=True),
-            )
-            .filter(matched=F("total"))
-            .exclude(total=0)
-            .prefetch_related(
-                "rules",
-                "items__equipment",
-                "items__weapon_profile",
-            )
+        expansion_rules = cls.rules.through.objects.filter(
+            contentequipmentlistexpansion_id=OuterRef("pk")
+        )
+        applicable_expansions = cls.objects.filter(
+            # An expansion with no rules never applies
+            Exists(expansion_rules),
+            # No rule of the expansion may be missing from applicable_rule_ids
+            ~Exists(
+                expansion_rules.exclude(
+                    contentequipmentlistexpansionrule_id__in=applicable_rule_ids
+                )
+            ),
         )
 
         return applicable_expansions
@@ -131,21 +193,11 @@ class ContentEquipmentListExpansion(Content):
         Return expansion items for the specified equipment (and optional weapon profile)
         that are available due to applicable expansions for the given rule inputs.
         """
-        # First check if this equipment/profile combination exists in any expansion
-        exists_in_expansion = ContentEquipmentListExpansionItem.objects.filter(
-            equipment=equipment,
-            weapon_profile=weapon_profile,
-        ).exists()
-
-        # If not in any expansion, return empty queryset to avoid expansion checks
-        if not exists_in_expansion:
-            return ContentEquipmentListExpansionItem.objects.none()
-
         # Filter expansions that include the specified equipment and optionally weapon profile
         return ContentEquipmentListExpansionItem.objects.filter(
             equipment=equipment,
             weapon_profile=weapon_profile,
-            expansion__in=cls.get_applicable_expansions(rule_inputs),
+            expansion__in=cls.get_applicable_expansion_ids(rule_inputs),
             **kwargs,
         )
 
@@ -156,58 +208,38 @@ class ContentEquipmentListExpansion(Content):
         Returns a queryset of ContentEquipment with cost annotations.
         Also includes weapon profiles when specified.
         """
-        expansions = cls.get_applicable_expansions(rule_inputs)
-
-        # Get all equipment IDs and profile IDs from applicable expansions
-        equipment_data = {}  # Maps equipment_id -> {cost, profiles: {profile_id: cost}}
-
-        # Prefetch items to avoid N+1 queries
-        prefetched_expansions = cls.objects.filter(
-            id__in=[e.id for e in expansions]
-        ).prefetch_related("items", "items__weapon_profile")
-
-        for expansion in prefetched_expansions:
-            for item in expansion.items.all():
-                eq_id = item.equipment_id
-
-                if eq_id not in equipment_data:
-                    equipment_data[eq_id] = {"cost": None, "profiles": {}}
-
-                if item.weapon_profile_id:
-                    # This is a specific weapon profile
-                    equipment_data[eq_id]["profiles"][item.weapon_profile_id] = (
-                        item.cost
-                    )
-                else:
-                    # This is base equipment
-                    equipment_data[eq_id]["cost"] = item.cost
-
-        # Get the equipment and annotate with cost overrides
-        equipment_ids = list(equipment_data.keys())
-        equipment = ContentEquipment.objects.filter(id__in=equipment_ids)
+        expansion_ids = cls.get_applicable_expansion_ids(rule_inputs)
 
-        # Apply cost overrides using Case/When
-        cost_overrides = {
-            eq_id: data["cost"]
-            for eq_id, data in equipment_data.items()
-            if data["cost"] is not None
-        }
+        # Get the equipment from all applicable expansions in a single query
+        equipment_ids = set(
+            ContentEquipmentListExpansionItem.objects.filter(
+                expansion__in=expansion_ids
+            ).values_list("equipment_id", flat=True)
+        )
+        equipment = ContentEquipment.objects.filter(id__in=equipment_ids)
 
-        if cost_overrides:
-            when_clauses = [
-                When(id=eq_id, then=cost) for eq_id, cost in cost_overrides.items()
-            ]
-            equipment = equipment.annotate(
-                expansion_cost_override=Case(
-                    *when_clauses,
-                    default=models.F("cost_cast_int"),
-                    output_field=models.IntegerField(),
-                )
+        # Apply cost overrides for base equipment (not weapon profiles). A
+        # correlated subquery keeps the SQL the same size however many
+        # overrides there are, unlike one WHEN per overridden item. If several
+        # expansions override the same equipment, the expansion that sorts last
+        # by name wins, as it did when the overrides were collected in order.
+        cost_override = (
+            ContentEquipmentListExpansionItem.objects.filter(
+                expansion__in=expansion_ids,
+                equipment=OuterRef("pk"),
+                weapon_profile__isnull=True,
+                cost__isnull=False,
             )
-        else:
-            equipment = equipment.annotate(
-                expansion_cost_override=models.F("cost_cast_int")
+            .order_by("-expansion__name", "-expansion_id")
+            .values("cost")[:1]
+        )
+        equipment = equipment.annotate(
+            expansion_cost_override=Coalesce(
+                Subquery(cost_override),
+                models.F("cost_cast_int"),
+                output_field=models.IntegerField(),
             )
+        )
 
         return equipment
 
@@ -220,6 +252,27 @@ class ContentEquipmentListExpansion(Content):
         ordering = ["name"]
 
 
+class ContentEquipmentListExpansionItemQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for :model:`content.ContentEquipmentListExpansionItem`.
+    """
+
+    def with_display(self) -> "ContentEquipmentListExpansionItemQuerySet":
+        """
+        Selects the related objects used by __str__, so items can be displayed
+        without a query per item.
+        """
+        return self.select_related("equipment", "weapon_profile", "expansion")
+
+
+class ContentEquipmentListExpansionItemManager(models.Manager):
+    """
+    Custom manager for :model:`content.ContentEquipmentListExpansionItem` model.
+    """
+
+    pass
+
+
 class ContentEquipmentListExpansionItem(Content):
     """
     Represents a single equipment item that becomes available as part of an expansion.
@@ -252,6 +305,10 @@ class ContentEquipmentListExpansionItem(Content):
 
     history = HistoricalRecords()
 
+    objects = ContentEquipmentListExpansionItemManager.from_queryset(
+        ContentEquipmentListExpansionItemQuerySet
+    )()
+
     def __str__(self):
         cost_str = (
             f" ({format_cost_display(self.cost)})" if self.cost is not None else ""
@@ -324,34 +381,34 @@ class ContentEquipmentListExpansionRuleByAttribute(ContentEquipmentListExpansion
         help_text="Specific values to match (empty = any value except 'not set')",
     )
 
+    @cached_property
+    def attribute_value_ids(self) -> frozenset:
+        """IDs of the values this rule matches, reusing any prefetched values."""
+        return frozenset(value.id for value in self.attribute_values.all())
+
     def match(self, rule_inputs: ExpansionRuleInputs) -> bool:
         """Check if the list has the required attribute value."""
         list_obj: "List" = rule_inputs.list
 
         # Get the list's attribute values for this attribute
         list_values = list_obj.attributes.filter(
-            attribute=self.attribute, listattributeassignment__archived=False
+            attribute_id=self.attribute_id,
+            listattributeassignment__archived=False,
         )
 
-        # If no list values, the rule doesn't match
-        if not list_values.exists():
-            return False
-
-        # Get the specified values for this rule
-        rule_values = self.attribute_values.all()
-
         # If no specific values specified, match any value (except not having the attribute)
-        if not rule_values.exists():
-            return True
+        if not self.attribute_value_ids:
+            return list_values.exists()
 
         # Check if any of the list's values match the rule's values
-        return any(list_value in rule_values for list_value in list_values)
+        return list_values.filter(id__in=self.attribute_value_ids).exists()
 
     def __str__(self):
-        values = self.attribute_values.all()
-        if values.exists():
+        # Evaluate the values once, reusing any prefetched values
+        values = list(self.attribute_values.all())
+        if values:
             values_str = ", ".join(str(v) for v in values[:3])
-            if values.count() > 3:
+            if len(values) > 3:
                 values_str += "..."
         else:
             values_str = "any"
@@ -399,6 +456,14 @@ class ContentEquipmentListExpansionRuleByFighterCategory(
         help_text="Fighter categories that must match",
     )
 
+    @property
+    def _category_set(self) -> frozenset:
+        """The categories as a set, so matching can't hit a substring of the CSV."""
+        categories = self.fighter_categories
+        if isinstance(categories, str):
+            categories = categories.split(",") if categories else []
+        return frozenset(categories)
+
     def match(self, rule_inputs: ExpansionRuleInputs) -> bool:
         """Check if the fighter is one of the required categories."""
         fighter: "ListFighter" = rule_inputs.fighter
@@ -409,7 +474,7 @@ class ContentEquipmentListExpansionRuleByFighterCategory(
         if not category:
             return False
 
-        return category in self.fighter_categories
+        return category in self._category_set
 
     def __str__(self):
         categories = ", ".join(
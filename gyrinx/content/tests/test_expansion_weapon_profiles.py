@@ -581,3 +581,32 @@ def test_expansion_profile_cost_does_not_affect_base_equipment():
 
     # Hotshot profile should have expansion cost override
     assert hotshot_profile.cost_for_fighter == 5  # Expansion discount applied
+
+
+@pytest.mark.django_db
+def test_expansion_items_with_display(django_assert_num_queries):
+    """Test that with_display() lets expansion items be displayed without queries."""
+    category = ContentEquipmentCategory.objects.create(name="Display Category")
+    weapon = ContentEquipment.objects.create(
+        name="Display Gun", category=category, cost="20"
+    )
+    profile = ContentWeaponProfile.objects.create(
+        equipment=weapon, name="Special Ammo", cost=10
+    )
+    expansion = ContentEquipmentListExpansion.objects.create(name="Display Access")
+    ContentEquipmentListExpansionItem.objects.create(
+        expansion=expansion, equipment=weapon, cost=15
+    )
+    ContentEquipmentListExpansionItem.objects.create(
+        expansion=expansion, equipment=weapon, weapon_profile=profile, cost=5
+    )
+
+    items = list(ContentEquipmentListExpansionItem.objects.with_display())
+
+    with django_assert_num_queries(0):
+        names = {str(item) for item in items}
+
+    assert names == {
+        "Display Gun (15¢) in Display Access",
+        "Display Gun - Special Ammo (5¢) in Display Access",
+    }
@@ -359,6 +359,16 @@ class List(AppBase):
             "attribute_value", "attribute_value__attribute"
         )
 
+    @property
+    def active_attribute_value_ids(self):
+        """
+        IDs of the list's active attribute values.
+
+        Read from the foreign key column of the (cached) assignments, so no
+        further query is needed once the assignments have been loaded.
+        """
+        return [aa.attribute_value_id for aa in self.active_attributes_cached]
+
     @cached_property
     def all_attributes(self):
         # Build a map of attribute_id to value names
@@ -1723,10 +1733,7 @@ class ListFighter(AppBase):
         )
 
         rule_inputs = ExpansionRuleInputs(list=self.list, fighter=self)
-        applicable_expansions = ContentEquipmentListExpansion.get_applicable_expansions(
-            rule_inputs
-        )
-        if len(applicable_expansions) > 0:
+        if ContentEquipmentListExpansion.get_applicable_expansion_ids(rule_inputs):
             return True
 
         # Check if fighter has actual assigned gear from restricted categories
@@ -1,6 +1,8 @@
 import hashlib
 import random
 import re
+import time
+from functools import lru_cache
 
 import bleach
 import bleach.css_sanitizer
@@ -9,11 +11,13 @@ import qrcode.image.svg
 from django import template
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.template.context import RequestContext
 from django.urls import resolve
 from django.urls.exceptions import Resolver404
-from django.utils.html import format_html
-from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.html import conditional_escape, format_html
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 from django.utils.safestring import mark_safe
 
 from gyrinx.content.models import ContentPageRef
@@ -22,15 +26,22 @@ from gyrinx.core import url
 register = template.Library()
 
 
+def _resolved_view_name(request):
+    """Resolve the request path once per request and cache the view name."""
+    if not hasattr(request, "_resolved_view_name"):
+        try:
+            request._resolved_view_name = resolve(request.path).view_name
+        except Resolver404:
+            # We can't resolve the request path (e.g. on a 404 page!)
+            request._resolved_view_name = None
+    return request._resolved_view_name
+
+
 def is_active(context: RequestContext, name):
     """Check if the current view is active."""
-    try:
-        match = resolve(context.request.path)
-        return name == match.view_name
-    except Resolver404:
-        # We can't resolve the request path (e.g. on a 404 page!)
-        # so it can't be active.
-        return False
+    view_name = _resolved_view_name(context.request)
+    # An unresolvable path can't be active
+    return view_name is not None and name == view_name
 
 
 @register.simple_tag(takes_context=True)
@@ -68,66 +79,89 @@ def lookup(dictionary, key):
     return dictionary.get(key)
 
 
+def _qt_params(request):
+    """
+    Get a mutable copy of the request's query parameters as a dict of lists.
+
+    The dict is built from request.GET once per request, and each call returns a
+    shallow copy of it, which is much cheaper than copying the QueryDict. Callers
+    must replace lists rather than mutate them in place.
+    """
+    if not hasattr(request, "_qt_params"):
+        request._qt_params = dict(request.GET.lists())
+    return dict(request._qt_params)
+
+
+def _qt_urlencode(params):
+    """
+    Encode a dict of lists as QueryDict.urlencode would.
+
+    django.utils.http.urlencode rejects None, where QueryDict writes "None", so
+    convert each value to a string first.
+    """
+    return urlencode(
+        {k: [str(v) for v in values] for k, values in params.items()}, doseq=True
+    )
+
+
 @register.simple_tag
 def qt(request, **kwargs):
-    updated = request.GET.copy()
+    updated = _qt_params(request)
     for k, v in kwargs.items():
         if v is not None:
-            updated[k] = v
+            updated[k] = [v]
         else:
-            updated.pop(k, 0)  # Remove or return 0 - aka, delete safely this key
+            updated.pop(k, None)
 
-    return updated.urlencode()
+    return _qt_urlencode(updated)
 
 
 @register.simple_tag
 def qt_nth(request, **kwargs):
     nth = kwargs.pop("nth")
-    updated = request.GET.copy()
+    updated = _qt_params(request)
     for k, v in kwargs.items():
-        current = updated.getlist(k)
+        current = list(updated.get(k, []))
         if nth < len(current):
             current[nth] = v
         else:
             current.append(v)
-        updated.setlist(k, current)
+        updated[k] = current
 
-    return updated.urlencode()
+    return _qt_urlencode(updated)
 
 
 @register.simple_tag
 def qt_rm_nth(request, **kwargs):
     nth = kwargs.pop("nth")
-    updated = request.GET.copy()
+    updated = _qt_params(request)
     for k, v in kwargs.items():
         if str(v) != "1":
             continue
-        current = updated.getlist(k)
+        current = list(updated.get(k, []))
         if nth < len(current):
             current.pop(nth)
-            updated.setlist(k, current)
+            updated[k] = current
 
-    return updated.urlencode()
+    return _qt_urlencode(updated)
 
 
 @register.simple_tag
 def qt_append(request, **kwargs):
-    updated = request.GET.copy()
+    updated = _qt_params(request)
     for k, v in kwargs.items():
-        current = updated.getlist(k)
-        current.append(v)
-        updated.setlist(k, current)
+        updated[k] = [*updated.get(k, []), v]
 
-    return updated.urlencode()
+    return _qt_urlencode(updated)
 
 
 @register.simple_tag
 def qt_rm(request, *args):
-    updated = request.GET.copy()
+    updated = _qt_params(request)
     for k in args:
-        updated.pop(k, 0)
+        updated.pop(k, None)
 
-    return updated.urlencode()
+    return _qt_urlencode(updated)
 
 
 @register.simple_tag
@@ -156,8 +190,8 @@ def to_str(value):
     return str(value)
 
 
-@register.simple_tag
-def ref(*args, category=None, value=None):
+@register.simple_tag(takes_context=True)
+def ref(context, *args, category=None, value=None):
     """
     Render a reference to a rulebook page.
 
@@ -167,49 +201,190 @@ def ref(*args, category=None, value=None):
     This tag is cached, so it can be called multiple times with the same arguments
     without incurring a performance penalty. The references almost never change,
     so this should be very safe to do.
+
+    Inside a {% refbatch %} block, the lookup is deferred so that the whole
+    block can be resolved at once.
     """
     search_value = " ".join(args)
     if not value:
         value = search_value
 
-    search_value_hash = hashlib.sha1(search_value.encode("utf-8")).hexdigest()
-    cache_key = f"ref_{search_value_hash}"
+    key = (search_value, category, value)
+    batch = context.get("_ref_batch")
+    if batch is None:
+        return _ref(*key)
 
-    kwargs = {}
-    if category:
-        kwargs["category"] = category
-        cat_hash = hashlib.sha1(category.encode("utf-8")).hexdigest()
-        cache_key += f"_{cat_hash}"
+    # Only digits and NULs, so the placeholder survives escaping and filters
+    return mark_safe(batch.setdefault(key, f"\x00{len(batch)}\x00"))
 
-    if cache.has_key(cache_key):
-        return cache.get(cache_key)
 
-    refs = ContentPageRef.find_similar(search_value, **kwargs)
+# Placeholders for deferred refs, numbered in the order they were added
+REF_PLACEHOLDER_RE = re.compile(r"\x00(\d+)\x00")
+
+
+class RefBatchNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        batch = {}
+        with context.push(_ref_batch=batch):
+            output = self.nodelist.render(context)
+
+        if not batch:
+            return output
+
+        # Placeholders are numbered in the order the refs were added
+        keys = list(batch)
+        resolved = _prime_refs(keys)
+
+        def substitute(match):
+            index = int(match.group(1))
+            if index >= len(keys):
+                return match.group(0)
+            key = keys[index]
+            rendered = resolved[key] if key in resolved else _ref(*key)
+            # simple_tag would escape a plain value, so do the same here
+            return conditional_escape(rendered)
+
+        # Substitute every placeholder in a single pass over the output
+        return mark_safe(REF_PLACEHOLDER_RE.sub(substitute, output))
+
+
+@register.tag
+def refbatch(parser, token):
+    """
+    Resolve every {% ref %} inside the block together.
+
+    The refs are collected while the block renders, looked up with a single
+    query for all cache misses, and then substituted into the output.
+
+    Syntax::
+
+        {% refbatch %}...{% endrefbatch %}
+    """
+    nodelist = parser.parse(("endrefbatch",))
+    parser.delete_first_token()
+    return RefBatchNode(nodelist)
+
+
+# Distinguishes a cache miss from a cached value
+_CACHE_MISS = object()
+
 
+def _ref_cache_key(search_value, category, value):
+    # A short blake2b digest is plenty for a cache key and cheaper than SHA-1.
+    # The display value is part of the key because it's part of the output.
+    key_source = "\x1f".join([search_value, category or "", str(value)])
+    key_hash = hashlib.blake2b(key_source.encode("utf-8"), digest_size=8).hexdigest()
+    return f"ref_{key_hash}"
+
+
+def _render_ref(refs, value):
     if not refs:
-        cache.set(cache_key, value)
         return value
 
     ref_str = ", ".join(ref.bookref() for ref in refs)
 
-    full_ref = format_html(
+    return format_html(
         '<span data-bs-toggle="tooltip" data-bs-title="{}" class="tooltipped">{}</span>',
         ref_str,
         value,
     )
+
+
+def _prime_refs(keys):
+    """
+    Resolve a batch of refs, looking up all the cache misses at once.
+
+    Returns a dict mapping each key to its rendered ref. The misses are also
+    written to the cache.
+    """
+    cache_keys = {key: _ref_cache_key(*key) for key in keys}
+    cached = cache.get_many(cache_keys.values())
+
+    resolved = {}
+    missing_by_category = {}
+    for key, cache_key in cache_keys.items():
+        if cache_key in cached:
+            resolved[key] = cached[cache_key]
+        else:
+            missing_by_category.setdefault(key[1], []).append(key)
+
+    rendered = {}
+    for category, missing in missing_by_category.items():
+        kwargs = {}
+        if category:
+            kwargs["category"] = category
+
+        found = ContentPageRef.find_similar_bulk(
+            (search_value for search_value, _, _ in missing), **kwargs
+        )
+        for key in missing:
+            search_value, _, value = key
+            resolved[key] = _render_ref(found[search_value], value)
+            rendered[cache_keys[key]] = resolved[key]
+
+    if rendered:
+        cache.set_many(rendered)
+    return resolved
+
+
+# Memoized refs expire after this many seconds, like entries in the Django
+# cache with its default TIMEOUT, so edits made in other processes show up
+REF_MEMO_TIMEOUT = 300
+
+
+def _ref(search_value, category, value):
+    """
+    Look up and render a rulebook reference.
+
+    Results are memoized in-process for up to REF_MEMO_TIMEOUT seconds, so
+    repeated references don't go to the cache backend at all. Misses fall back
+    to the Django cache, then to the database. Saving or deleting a
+    ContentPageRef clears the memo in the process that made the change.
+    """
+    epoch = int(time.monotonic() // REF_MEMO_TIMEOUT)
+    return _memoized_ref(search_value, category, value, epoch)
+
+
+@lru_cache(maxsize=4096)
+def _memoized_ref(search_value, category, value, epoch):
+    # The epoch is only part of the memo key, so entries expire when it changes
+    cache_key = _ref_cache_key(search_value, category, value)
+
+    kwargs = {}
+    if category:
+        kwargs["category"] = category
+
+    # A single get with a sentinel default, rather than has_key then get
+    cached = cache.get(cache_key, _CACHE_MISS)
+    if cached is not _CACHE_MISS:
+        return cached
+
+    refs = ContentPageRef.find_similar(search_value, **kwargs)
+    full_ref = _render_ref(refs, value)
     cache.set(cache_key, full_ref)
     return full_ref
 
 
+@receiver([post_save, post_delete], sender=ContentPageRef)
+def _clear_ref_memo(**kwargs):
+    _memoized_ref.cache_clear()
+
+
+# Fixed mm dimensions on the generated QR code SVG, stripped so it scales
+QR_SVG_SIZE_RE = re.compile(r'(?:width|height)="\d+mm"')
+
+
 @register.simple_tag
 def qr_svg(value):
     code = qrcode.make(
         value, image_factory=qrcode.image.svg.SvgPathImage, box_size=10, border=0
     ).to_string(encoding="unicode")
 
-    code = re.sub(r'width="\d+mm"', "", code)
-    code = re.sub(r'height="\d+mm"', "", code)
-    code = re.sub(r"<svg ", '<svg width="100%" height="100%" ', code)
+    code = QR_SVG_SIZE_RE.sub("", code)
+    code = code.replace("<svg ", '<svg width="100%" height="100%" ')
 
     return mark_safe(code)
 
@@ -224,15 +399,28 @@ def settings_value(name):
     return getattr(settings, name, "")
 
 
-@register.simple_tag
-def get_skill(skill_id):
-    """Get a ContentSkill by its ID."""
+@register.simple_tag(takes_context=True)
+def get_skill(context, skill_id):
+    """
+    Get a ContentSkill by its ID.
+
+    Skills are memoized on the request, so a skill shown several times on a
+    page is only fetched once.
+    """
     from gyrinx.content.models import ContentSkill
 
-    try:
-        return ContentSkill.objects.get(pk=skill_id)
-    except ContentSkill.DoesNotExist:
-        return None
+    request = getattr(context, "request", None)
+    skill_cache = getattr(request, "_skill_cache", None)
+    if skill_cache is None:
+        skill_cache = {}
+        if request is not None:
+            request._skill_cache = skill_cache
+
+    key = str(skill_id)
+    if key not in skill_cache:
+        # filter().first() so a missing skill is memoized as None too
+        skill_cache[key] = ContentSkill.objects.filter(pk=skill_id).first()
+    return skill_cache[key]
 
 
 @register.filter
@@ -211,6 +211,41 @@ def test_expansion_rule_by_attribute_any_value_ignores_archived():
     assert rule.match(inputs) is True
 
 
+@pytest.mark.django_db
+def test_expansion_rule_by_attribute_match_single_query(django_assert_num_queries):
+    """Test that attribute rule matching is one query when values are prefetched."""
+    affiliation = ContentAttribute.objects.create(
+        name="Affiliation", is_single_select=False
+    )
+    malstrain = ContentAttributeValue.objects.create(
+        attribute=affiliation, name="Malstrain Corrupted"
+    )
+    water_guild = ContentAttributeValue.objects.create(
+        attribute=affiliation, name="Water Guild"
+    )
+
+    rule = ContentEquipmentListExpansionRuleByAttribute.objects.create(
+        attribute=affiliation
+    )
+    rule.attribute_values.add(malstrain)
+    rule = ContentEquipmentListExpansionRuleByAttribute.objects.prefetch_related(
+        "attribute_values"
+    ).get(pk=rule.pk)
+
+    house = ContentHouse.objects.create(name="Outcasts")
+    gang_list = List.objects.create(name="Test Gang", content_house=house)
+    ListAttributeAssignment.objects.create(list=gang_list, attribute_value=water_guild)
+    inputs = ExpansionRuleInputs(list=gang_list)
+
+    with django_assert_num_queries(1):
+        assert rule.match(inputs) is False
+
+    ListAttributeAssignment.objects.create(list=gang_list, attribute_value=malstrain)
+
+    with django_assert_num_queries(1):
+        assert rule.match(inputs) is True
+
+
 @pytest.mark.django_db
 def test_expansion_rule_by_house():
     """Test house rule matching."""
@@ -295,6 +330,68 @@ def test_expansion_rule_by_fighter_category():
     assert rule.match(inputs5) is False
 
 
+@pytest.mark.django_db
+def test_expansion_rule_by_fighter_category_matches_raw_value():
+    """Test a rule holding the raw comma-separated value matches whole categories."""
+    leader = ContentFighter.objects.create(
+        type="Leader", category=FighterCategoryChoices.LEADER
+    )
+    champion = ContentFighter.objects.create(
+        type="Champion", category=FighterCategoryChoices.CHAMPION
+    )
+    house = ContentHouse.objects.create(name="Test House")
+    gang_list = List.objects.create(name="Test Gang", content_house=house)
+    lf_leader = ListFighter.objects.create(
+        list=gang_list, content_fighter=leader, name="Leader Fighter"
+    )
+    lf_champion = ListFighter.objects.create(
+        list=gang_list, content_fighter=champion, name="Champion Fighter"
+    )
+
+    rule = ContentEquipmentListExpansionRuleByFighterCategory(
+        fighter_categories="HANGER_ON,LEADER"
+    )
+
+    assert rule.match(ExpansionRuleInputs(list=gang_list, fighter=lf_leader)) is True
+    assert (
+        rule.match(ExpansionRuleInputs(list=gang_list, fighter=lf_champion)) is False
+    )
+
+
+@pytest.mark.django_db
+def test_fighter_category_rule_matches_whole_categories_in_sql():
+    """Test the SQL lookup doesn't match a category inside another stored entry."""
+    leader = ContentFighter.objects.create(
+        type="Leader", category=FighterCategoryChoices.LEADER
+    )
+    house = ContentHouse.objects.create(name="Test House")
+    gang_list = List.objects.create(name="Test Gang", content_house=house)
+    lf_leader = ListFighter.objects.create(
+        list=gang_list, content_fighter=leader, name="Leader Fighter"
+    )
+
+    # Stands in for any stored entry whose name contains another category
+    rule = ContentEquipmentListExpansionRuleByFighterCategory.objects.create(
+        fighter_categories=["SQUAD_LEADER", FighterCategoryChoices.JUVE]
+    )
+    expansion = ContentEquipmentListExpansion.objects.create(name="Squad Gear")
+    expansion.rules.add(rule)
+
+    inputs = ExpansionRuleInputs(list=gang_list, fighter=lf_leader)
+    assert expansion not in ContentEquipmentListExpansion.get_applicable_expansions(
+        inputs
+    )
+    assert rule.match(inputs) is False
+
+    rule.fighter_categories = ["SQUAD_LEADER", FighterCategoryChoices.LEADER]
+    rule.save()
+    assert expansion in ContentEquipmentListExpansion.get_applicable_expansions(
+        inputs
+    )
+    # The parsed categories follow reassignment of the field
+    assert rule.match(inputs) is True
+
+
 @pytest.mark.django_db
 def test_expansion_applies_with_multiple_rules():
     """Test expansion with multiple rules (AND logic)."""
@@ -365,6 +462,75 @@ def test_expansion_applies_with_multiple_rules():
     )
 
 
+@pytest.mark.django_db
+def test_expansion_applies_with_any_value_attribute_rule():
+    """Test that applies_to and get_applicable_expansions agree on 'any value' rules."""
+    affiliation = ContentAttribute.objects.create(name="Affiliation")
+    malstrain = ContentAttributeValue.objects.create(
+        attribute=affiliation, name="Malstrain Corrupted"
+    )
+    alignment = ContentAttribute.objects.create(name="Alignment")
+    law_abiding = ContentAttributeValue.objects.create(
+        attribute=alignment, name="Law Abiding"
+    )
+
+    # Rule with no specific values matches any affiliation
+    rule = ContentEquipmentListExpansionRuleByAttribute.objects.create(
+        attribute=affiliation
+    )
+    expansion = ContentEquipmentListExpansion.objects.create(name="Any Affiliation")
+    expansion.rules.add(rule)
+
+    # Expansions without rules never apply
+    ContentEquipmentListExpansion.objects.create(name="No Rules")
+
+    house = ContentHouse.objects.create(name="Outcasts")
+    affiliated = List.objects.create(name="Affiliated", content_house=house)
+    ListAttributeAssignment.objects.create(list=affiliated, attribute_value=malstrain)
+    aligned = List.objects.create(name="Aligned", content_house=house)
+    ListAttributeAssignment.objects.create(list=aligned, attribute_value=law_abiding)
+
+    inputs = ExpansionRuleInputs(list=affiliated)
+    assert expansion.applies_to(inputs) is True
+    assert list(ContentEquipmentListExpansion.get_applicable_expansions(inputs)) == [
+        expansion
+    ]
+
+    inputs = ExpansionRuleInputs(list=aligned)
+    assert expansion.applies_to(inputs) is False
+    assert not ContentEquipmentListExpansion.get_applicable_expansions(inputs).exists()
+
+
+@pytest.mark.django_db
+def test_get_applicable_expansion_ids_is_cached_on_list():
+    """Test that applicable expansion IDs are cached per list instance and fighter."""
+    house = ContentHouse.objects.create(name="Delaque")
+    rule = ContentEquipmentListExpansionRuleByHouse.objects.create(house=house)
+    expansion = ContentEquipmentListExpansion.objects.create(name="Delaque Gear")
+    expansion.rules.add(rule)
+
+    gang_list = List.objects.create(name="Delaque Gang", content_house=house)
+    inputs = ExpansionRuleInputs(list=gang_list)
+    assert ContentEquipmentListExpansion.get_applicable_expansion_ids(inputs) == (
+        expansion.id,
+    )
+
+    # A new expansion isn't seen by the same list instance...
+    other_expansion = ContentEquipmentListExpansion.objects.create(name="More Gear")
+    other_expansion.rules.add(rule)
+    assert ContentEquipmentListExpansion.get_applicable_expansion_ids(inputs) == (
+        expansion.id,
+    )
+
+    # ...but is seen by a freshly loaded list
+    gang_list = List.objects.get(pk=gang_list.pk)
+    inputs = ExpansionRuleInputs(list=gang_list)
+    assert set(ContentEquipmentListExpansion.get_applicable_expansion_ids(inputs)) == {
+        expansion.id,
+        other_expansion.id,
+    }
+
+
 @pytest.mark.django_db
 def test_expansion_with_archived_list_attribute_assignment():
     """Test that expansions don't apply when list attributes are archived."""
@@ -825,9 +991,10 @@ def test_multiple_expansions_for_same_equipment():
     # Get expansion equipment - should get both expansions' items
     equipment_qs = ContentEquipmentListExpansion.get_expansion_equipment(rule_inputs)
 
-    # The equipment should appear once, with one of the costs
-    # (implementation detail - currently takes the last one found)
+    # The equipment should appear once, with the cost from the expansion that
+    # sorts last by name
     assert equipment_qs.count() == 1
+    assert equipment_qs.get().expansion_cost_override == 50
 
 
 @pytest.mark.django_db
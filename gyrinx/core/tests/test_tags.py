@@ -1,7 +1,24 @@
+from collections import namedtuple
+
 import pytest
+from django.core.cache import cache
+from django.template import Context, Template
 from django.template.context import make_context as django_make_context
 
-from gyrinx.core.templatetags.custom_tags import is_active
+from gyrinx.content.models import ContentSkill, ContentSkillCategory
+from gyrinx.core.templatetags.custom_tags import (
+    _memoized_ref,
+    get_skill,
+    is_active,
+    lookup,
+    qr_svg,
+    qt,
+    qt_append,
+    qt_nth,
+    qt_rm,
+    qt_rm_nth,
+    ref,
+)
 
 
 @pytest.fixture
@@ -15,3 +32,112 @@ def make_context(rf):
 def test_is_active(make_context):
     context = make_context("/")
     assert is_active(context, "core:index")
+    assert not is_active(context, "core:lists")
+
+
+def test_is_active_unresolvable_path(make_context):
+    context = make_context("/this-page-does-not-exist")
+    assert not is_active(context, "core:index")
+
+
+@pytest.mark.django_db
+def test_ref_is_memoized(content_page_refs, django_assert_num_queries):
+    rendered = ref({}, "Agility")
+    assert "Core p256" in rendered
+
+    with django_assert_num_queries(0):
+        assert ref({}, "Agility") == rendered
+
+
+@pytest.mark.django_db
+def test_ref_memo_is_cleared_when_page_refs_change(content_page_refs):
+    ref({}, "Agility")
+    assert _memoized_ref.cache_info().currsize > 0
+
+    page_ref = content_page_refs.get(title="Agility")
+    page_ref.save()
+    assert _memoized_ref.cache_info().currsize == 0
+
+
+@pytest.mark.django_db
+def test_refbatch_resolves_refs_together(content_page_refs, django_assert_num_queries):
+    _memoized_ref.cache_clear()
+    cache.clear()
+    template = Template(
+        "{% load custom_tags %}{% refbatch %}"
+        "{% ref 'Agility' %}|{% ref 'Agility' value='Agile' %}|{% ref '<No Match>' %}"
+        "{% endrefbatch %}"
+    )
+
+    with django_assert_num_queries(1):
+        rendered = template.render(Context())
+
+    agility, agile, no_match = rendered.split("|")
+    assert "Core p256" in agility and agility.endswith(">Agility</span>")
+    assert "Core p256" in agile and agile.endswith(">Agile</span>")
+    assert no_match == "&lt;No Match&gt;"
+    assert "\x00" not in rendered
+
+
+def test_qr_svg_scales_to_container():
+    svg = qr_svg("https://gyrinx.app/")
+    assert '<svg width="100%" height="100%" ' in svg
+    assert 'mm"' not in svg
+
+
+def test_qt_tags(rf):
+    request = rf.get("/dice/?d=1&d=2&q=las+gun&flash=x")
+
+    assert qt(request, page=2) == "d=1&d=2&q=las+gun&flash=x&page=2"
+    assert qt(request, q="plasma", flash=None) == "d=1&d=2&q=plasma"
+    assert qt_nth(request, nth=1, d=3) == "d=1&d=3&q=las+gun&flash=x"
+    assert qt_nth(request, nth=5, d=3) == "d=1&d=2&d=3&q=las+gun&flash=x"
+    assert qt_rm_nth(request, nth=0, d=1, q=0) == "d=2&q=las+gun&flash=x"
+    assert qt_append(request, d=6, i=0) == "d=1&d=2&d=6&q=las+gun&flash=x&i=0"
+    assert qt_rm(request, "q", "flash") == "d=1&d=2"
+
+    # None is written out as a string, as QueryDict.urlencode does
+    assert qt_append(request, d=None) == "d=1&d=2&d=None&q=las+gun&flash=x"
+    assert qt_nth(request, nth=0, d=None) == "d=None&d=2&q=las+gun&flash=x"
+
+    # The request's own query parameters are never modified
+    assert request.GET.urlencode() == "d=1&d=2&q=las+gun&flash=x"
+
+
+def test_lookup_regrouped_list():
+    Group = namedtuple("Group", ["grouper", "list"])
+    groups = [Group("a", [1]), Group("b", [2, 3]), Group("a", [4])]
+
+    assert lookup(groups, "b") == [2, 3]
+    # The first group wins if a grouper appears more than once
+    assert lookup(groups, "a") == [1]
+    assert lookup(groups, "c") is None
+    assert lookup([Group("x", [5])], "x") == [5]
+    assert lookup({"a": 1}, "a") == 1
+
+
+def test_lookup_sees_in_place_changes():
+    Group = namedtuple("Group", ["grouper", "list"])
+    groups = [Group("a", [1])]
+
+    assert lookup(groups, "b") is None
+    groups.append(Group("b", [2]))
+    assert lookup(groups, "b") == [2]
+    groups[0] = Group("c", [3])
+    assert lookup(groups, "a") is None
+    assert lookup(groups, "c") == [3]
+
+
+@pytest.mark.django_db
+def test_get_skill_is_memoized_per_request(make_context, django_assert_num_queries):
+    category = ContentSkillCategory.objects.create(name="Agility", restricted=False)
+    skill = ContentSkill.objects.create(name="Sprint", category=category)
+    context = make_context("/")
+
+    with django_assert_num_queries(1):
+        assert get_skill(context, skill.id) == skill
+        assert get_skill(context, str(skill.id)) == skill
+
+    # A new request fetches the skill again
+    with django_assert_num_queries(1):
+        assert get_skill(make_context("/"), skill.id) == skill
@@ -2107,15 +2107,15 @@ def edit_list_fighter_equipment(request, id, fighter_id, is_weapon=False):
                 )
 
                 # Get applicable expansions using existing expansion_inputs
-                applicable_expansions = (
-                    ContentEquipmentListExpansion.get_applicable_expansions(
+                applicable_expansion_ids = (
+                    ContentEquipmentListExpansion.get_applicable_expansion_ids(
                         expansion_inputs
                     )
                 )
 
                 # Get weapon profiles from expansion items
                 expansion_profiles = ContentEquipmentListExpansionItem.objects.filter(
-                    expansion__in=applicable_expansions,
+                    expansion__in=applicable_expansion_ids,
                     equipment=item,
                     weapon_profile__isnull=False,
                 ).values_list("weapon_profile_id", flat=True)